@@ -1,17 +1,71 @@
+import asyncio
+import logging
 import os
 import math
 import random
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+import numpy as np
+import orjson
+from bson import ObjectId
+from fastapi import FastAPI, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, EmailStr
+from pymongo.errors import ConnectionFailure, DuplicateKeyError, OperationFailure
 
-from database import create_document, get_documents, db
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; haversine_bulk falls back to NumPy
+    njit = None
+
+from database import create_document, create_documents, get_documents, db
 from schemas import Account, Listing, Match, Message, Blog
 
-app = FastAPI(title="ConnectFood AI Backend")
+
+logger = logging.getLogger(__name__)
+
+
+async def bootstrap_db():
+    # Backfill GeoJSON points on listings created before `loc` existed
+    await db["listing"].update_many(
+        {"loc": {"$exists": False}},
+        [{"$set": {"loc": {"type": "Point", "coordinates": ["$lng", "$lat"]}}}],
+    )
+    try:
+        await db["account"].create_index("email", unique=True)
+    except OperationFailure as e:
+        # Duplicates left by the old racy register check block the unique build;
+        # carry on with the other indexes, register still checks before insert
+        logger.warning("Unique account.email index not built: %s", str(e)[:200])
+    await db["listing"].create_index([("loc", "2dsphere")])
+    await db["listing"].create_index("expires_at")
+    await db["match"].create_index([("donor_id", 1), ("created_at", -1)])
+    await db["match"].create_index([("recipient_id", 1), ("created_at", -1)])
+    await db["match"].create_index([("created_at", -1)])
+    await db["message"].create_index([("match_id", 1), ("created_at", 1)])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile (or load the cached) Numba kernel now rather than on the first request
+    haversine_bulk(0.0, 0.0, np.zeros(1), np.zeros(1), np.empty(1))
+    if db is not None:
+        try:
+            await bootstrap_db()
+        except ConnectionFailure as e:
+            # Keep serving (/ and /test report DB status) when Mongo is unreachable at boot.
+            # Any other bootstrap error (e.g. the 2dsphere build $geoNear needs) stops startup.
+            logger.warning("Database unreachable, skipped bootstrap: %s", str(e)[:200])
+    yield
+    if db is not None:
+        db.client.close()
+
+
+app = FastAPI(title="ConnectFood AI Backend", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,23 +77,64 @@ app.add_middleware(
 
 # Helpers
 
-def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+def haversine_vec(lat1: float, lon1: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
     R = 6371.0
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    phi1, phi2 = math.radians(lat1), np.radians(lats)
+    dphi = phi2 - phi1
+    dlambda = np.radians(lons - lon1)
+    a = np.sin(dphi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
     return R * c
 
 
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def haversine_bulk(lat0, lon0, lats, lons, out):
+        R = 6371.0
+        phi1 = math.radians(lat0)
+        cos_phi1 = math.cos(phi1)
+        for i in prange(lats.shape[0]):
+            phi2 = math.radians(lats[i])
+            dphi = phi2 - phi1
+            dlambda = math.radians(lons[i] - lon0)
+            a = math.sin(dphi / 2) ** 2 + cos_phi1 * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+            out[i] = R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+        return out
+else:
+    def haversine_bulk(lat0, lon0, lats, lons, out):
+        out[:] = haversine_vec(lat0, lon0, lats, lons)
+        return out
+
+
+def top_k_matches(scores: np.ndarray, dists: np.ndarray, k: int) -> np.ndarray:
+    # Best score first, nearer recipient breaks ties. Partition on score and
+    # only fully sort the candidates tied with or above the k-th best score.
+    if scores.shape[0] > k:
+        kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        idx = np.flatnonzero(scores >= kth)
+    else:
+        idx = np.arange(scores.shape[0])
+    return idx[np.lexsort((dists[idx], -scores[idx]))][:k]
+
+
+# Below this radius the flat-earth approximation is well under 1% off haversine
+EQUIRECT_MAX_KM = 25.0
+KM_PER_DEG = 6371.0 * math.pi / 180.0
+
+
+def equirect_km(lat0: float, lon0: float, lats, lons, cos_lat0: float):
+    x = (lons - lon0) * cos_lat0
+    y = lats - lat0
+    return KM_PER_DEG * np.hypot(x, y)
+
+
 @app.get("/")
-def root():
+async def root():
     return {"name": "ConnectFood AI", "message": "Backend running"}
 
 
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -56,7 +151,7 @@ def test_database():
             response["database_name"] = db.name
             response["connection_status"] = "Connected"
             try:
-                response["collections"] = db.list_collection_names()
+                response["collections"] = await db.list_collection_names()
                 response["database"] = "✅ Connected & Working"
             except Exception as e:
                 response["database"] = f"⚠️ Connected but error: {str(e)[:80]}"
@@ -79,9 +174,9 @@ class RegisterRequest(BaseModel):
 
 
 @app.post("/api/register")
-def register(req: RegisterRequest):
+async def register(req: RegisterRequest):
     # naive uniqueness check
-    existing = db["account"].find_one({"email": req.email}) if db else None
+    existing = await db["account"].find_one({"email": req.email}) if db is not None else None
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     acc = Account(
@@ -93,7 +188,11 @@ def register(req: RegisterRequest):
         lng=req.lng,
         is_active=True,
     )
-    _id = create_document("account", acc)
+    try:
+        _id = await create_document("account", acc)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent registration for the same email
+        raise HTTPException(status_code=400, detail="Email already registered")
     return {"_id": _id, "email": acc.email, "role": acc.role}
 
 
@@ -103,8 +202,8 @@ class LoginRequest(BaseModel):
 
 
 @app.post("/api/login")
-def login(req: LoginRequest):
-    user = db["account"].find_one({"email": req.email}) if db else None
+async def login(req: LoginRequest):
+    user = await db["account"].find_one({"email": req.email}) if db is not None else None
     if not user or user.get("password") != req.password:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     user["_id"] = str(user["_id"])  # serialize
@@ -112,6 +211,60 @@ def login(req: LoginRequest):
 
 
 # -------- Listings --------
+LISTINGS_CACHE_TTL_S = 30.0
+LISTINGS_CACHE_MAX_DOCS = 50_000  # cached candidate listings across all cells
+LISTINGS_CANDIDATE_LIMIT = 500  # 100-item page plus margin for callers off the cell centre
+LISTINGS_MAX_RADIUS_KM = 50.0
+LISTINGS_RADIUS_STEP_KM = 0.5  # cache key granularity; the exact radius is applied per caller
+LISTINGS_CELL_DEG = 0.01  # ~1 km grid query points are bucketed into
+# Upper bound on centre-to-corner distance of a cell (cos(lat) <= 1)
+LISTINGS_CELL_HALF_DIAG_KM = LISTINGS_CELL_DEG * KM_PER_DEG * math.sqrt(2) / 2
+# (cell_lat, cell_lng, radius bucket) -> (monotonic expiry, candidates, lats, lngs, expiry timestamps);
+# candidates is None when the cell is too dense to hold a complete candidate set
+_listings_cache: dict = {}
+_listings_cache_docs = 0
+
+
+def _expiry_ts(value) -> float:
+    # Mongo hands datetimes back naive (UTC); missing expiry never expires
+    if not isinstance(value, datetime):
+        return math.inf
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _live_listing_query(now: datetime) -> dict:
+    return {
+        "status": {"$in": ["available", "claimed"]},
+        "$or": [{"expires_at": None}, {"expires_at": {"$gt": now}}],
+    }
+
+
+def _listings_cache_size(entry: tuple) -> int:
+    # Empty and too-dense entries still cost one slot so the key count stays bounded too
+    return 1 + len(entry[1] or ())
+
+
+def _listings_cache_put(key: tuple, entry: tuple):
+    global _listings_cache_docs
+    old = _listings_cache.pop(key, None)
+    if old is not None:
+        _listings_cache_docs -= _listings_cache_size(old)
+    size = _listings_cache_size(entry)
+    # Evict oldest entries until the new candidates fit the document budget
+    while _listings_cache and _listings_cache_docs + size > LISTINGS_CACHE_MAX_DOCS:
+        evicted = _listings_cache.pop(next(iter(_listings_cache)))
+        _listings_cache_docs -= _listings_cache_size(evicted)
+    _listings_cache[key] = entry
+    _listings_cache_docs += size
+
+
+def _listings_cache_clear():
+    global _listings_cache_docs
+    _listings_cache.clear()
+    _listings_cache_docs = 0
+
 class CreateListingRequest(BaseModel):
     donor_id: str
     title: str
@@ -125,7 +278,7 @@ class CreateListingRequest(BaseModel):
 
 
 @app.post("/api/listings")
-def create_listing(req: CreateListingRequest):
+async def create_listing(req: CreateListingRequest):
     expires_at = datetime.now(timezone.utc) + timedelta(minutes=req.expires_in_minutes or 180)
     listing = Listing(
         donor_id=req.donor_id,
@@ -139,25 +292,91 @@ def create_listing(req: CreateListingRequest):
         expires_at=expires_at,
         status="available",
     )
-    _id = create_document("listing", listing)
+    data = listing.model_dump()
+    data["loc"] = {"type": "Point", "coordinates": [req.lng, req.lat]}
+    _id = await create_document("listing", data)
+    # A new listing can fall inside any cached radius, not just its own cell
+    _listings_cache_clear()
     return {"_id": _id}
 
 
-@app.get("/api/listings")
-def nearby_listings(lat: float, lng: float, radius_km: float = 10.0):
-    items = get_documents("listing") if db else []
-    now = datetime.now(timezone.utc)
-    results = []
+async def _fetch_cell_candidates(cell_lat: int, cell_lng: int, radius_bucket: float) -> tuple:
+    # Everything within the radius bucket of any point in the cell
+    items = await db["listing"].aggregate([
+        {"$geoNear": {
+            "near": {"type": "Point", "coordinates": [cell_lng * LISTINGS_CELL_DEG, cell_lat * LISTINGS_CELL_DEG]},
+            "distanceField": "distance_m",
+            "maxDistance": (radius_bucket + LISTINGS_CELL_HALF_DIAG_KM) * 1000.0,
+            "spherical": True,
+            "query": _live_listing_query(datetime.now(timezone.utc)),
+        }},
+        {"$limit": LISTINGS_CANDIDATE_LIMIT + 1},
+        {"$project": {"loc": 0, "distance_m": 0}},
+    ]).to_list(length=None)
+    expiry = time.monotonic() + LISTINGS_CACHE_TTL_S
+    if len(items) > LISTINGS_CANDIDATE_LIMIT:
+        return (expiry, None, None, None, None)
+    for it in items:
+        it["_id"] = str(it["_id"])
+    n = len(items)
+    lats = np.fromiter((it.get("lat", 0) for it in items), dtype=np.float64, count=n)
+    lngs = np.fromiter((it.get("lng", 0) for it in items), dtype=np.float64, count=n)
+    expires = np.fromiter((_expiry_ts(it.get("expires_at")) for it in items), dtype=np.float64, count=n)
+    return (expiry, items, lats, lngs, expires)
+
+
+async def _nearby_direct(lat: float, lng: float, radius_km: float) -> dict:
+    result = await db["listing"].aggregate([
+        {"$geoNear": {
+            "near": {"type": "Point", "coordinates": [lng, lat]},
+            "distanceField": "distance_m",
+            "maxDistance": radius_km * 1000.0,
+            "spherical": True,
+            "query": _live_listing_query(datetime.now(timezone.utc)),
+        }},
+        {"$facet": {
+            "items": [
+                {"$limit": 100},  # already closest first
+                {"$project": {"loc": 0}},
+            ],
+            "total": [{"$count": "n"}],
+        }},
+    ]).to_list(length=None)
+    items, total = result[0]["items"], result[0]["total"]
     for it in items:
-        it_id = str(it.get("_id"))
-        if it.get("expires_at") and isinstance(it.get("expires_at"), datetime) and it["expires_at"] < now:
-            continue
-        d = haversine_km(lat, lng, it.get("lat", 0), it.get("lng", 0))
-        if d <= radius_km and it.get("status") in ("available", "claimed"):
-            it_copy = {**it, "_id": it_id, "distance_km": round(d, 2)}
-            results.append(it_copy)
-    results.sort(key=lambda x: x["distance_km"])  # closest first
-    return {"count": len(results), "items": results[:100]}
+        it["_id"] = str(it["_id"])
+        it["distance_km"] = round(it.pop("distance_m") / 1000.0, 2)
+    return {"count": total[0]["n"] if total else 0, "items": items}
+
+
+@app.get("/api/listings")
+async def nearby_listings(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(10.0, gt=0, le=LISTINGS_MAX_RADIUS_KM),
+):
+    if db is None:
+        return {"count": 0, "items": []}
+    cell_lat, cell_lng = round(lat / LISTINGS_CELL_DEG), round(lng / LISTINGS_CELL_DEG)
+    radius_bucket = math.ceil(radius_km / LISTINGS_RADIUS_STEP_KM) * LISTINGS_RADIUS_STEP_KM
+    key = (cell_lat, cell_lng, radius_bucket)
+    cached = _listings_cache.get(key)
+    if cached is None or cached[0] <= time.monotonic():
+        cached = await _fetch_cell_candidates(cell_lat, cell_lng, radius_bucket)
+        _listings_cache_put(key, cached)
+
+    _, items, lats, lngs, expires = cached
+    if items is None:
+        # Too many listings around this cell for a complete candidate set
+        return await _nearby_direct(lat, lng, radius_km)
+
+    # Exact filter and distances against the caller's own point; candidates
+    # may have expired since they were cached
+    d = haversine_bulk(lat, lng, lats, lngs, np.empty_like(lats))
+    idx = np.flatnonzero((d <= radius_km) & (expires > datetime.now(timezone.utc).timestamp()))
+    idx = idx[np.argsort(d[idx], kind="stable")]  # closest first
+    page = [{**items[i], "distance_km": round(float(d[i]), 2)} for i in idx[:100]]
+    return Response(content=orjson.dumps({"count": len(idx), "items": page}), media_type="application/json")
 
 
 # -------- Matching & Analytics (Prototype AI) --------
@@ -166,59 +385,77 @@ class MatchRequest(BaseModel):
 
 
 @app.post("/api/match")
-def compute_match(req: MatchRequest):
-    listing = db["listing"].find_one({"_id": db.get_collection("listing")._BaseObject__database.client.get_default_database().codec_options.document_class().fromkeys(["_id"])}) if False else db["listing"].find_one({"_id": db["listing"].find_one({"_id": None})})  # placeholder to satisfy linter
-    listing = db["listing"].find_one({"_id": db["listing"].find_one and None})  # will be replaced below
-    # Proper lookup by string id
-    from bson import ObjectId
+async def compute_match(req: MatchRequest):
     try:
-        listing = db["listing"].find_one({"_id": ObjectId(req.listing_id)})
+        lid = ObjectId(req.listing_id)
     except Exception:
         raise HTTPException(status_code=404, detail="Listing not found")
+    listing = await db["listing"].find_one(
+        {"_id": lid}, projection={"lat": 1, "lng": 1, "donor_id": 1, "type": 1, "quantity": 1}
+    )
     if not listing:
         raise HTTPException(status_code=404, detail="Listing not found")
 
-    recipients = list(db["account"].find({"role": "recipient", "is_active": True}))
+    recipients = await db["account"].find({"role": "recipient", "is_active": True}).to_list(length=None)
     if not recipients:
         return {"matches": []}
 
     lat, lng = listing.get("lat", 0.0), listing.get("lng", 0.0)
     qty = float(listing.get("quantity", 1))
-
-    matches: List[dict] = []
-    for r in recipients:
-        rlat, rlng = r.get("lat") or 0.0, r.get("lng") or 0.0
-        dist = haversine_km(lat, lng, rlat, rlng)
-        # Simple scoring: nearer is better, preference bump if tags/type word overlap (prototype)
-        type_match = 1.0 if listing.get("type", "").lower() in (listing.get("type", "").lower(),) else 0.8
-        freshness_factor = random.uniform(0.85, 1.0)
-        score = max(0.0, 1.0 - (dist / 20.0)) * 0.7 + type_match * 0.2 + freshness_factor * 0.1
-        eta = max(5.0, dist / 40.0 * 60.0)  # assume avg 40km/h
-        m = Match(
-            listing_id=str(listing["_id"]),
-            donor_id=listing.get("donor_id", ""),
+    n = len(recipients)
+    rlats = np.fromiter((r.get("lat") or 0.0 for r in recipients), dtype=np.float64, count=n)
+    rlngs = np.fromiter((r.get("lng") or 0.0 for r in recipients), dtype=np.float64, count=n)
+
+    # Bounding-box prefilter: only recipients inside the box get the flat-earth
+    # distance, everyone else goes straight to haversine
+    cos_lat0 = math.cos(math.radians(lat))
+    dlat = EQUIRECT_MAX_KM / KM_PER_DEG
+    dlng = dlat / max(cos_lat0, 1e-6)
+    near = (np.abs(rlats - lat) <= dlat) & (np.abs(rlngs - lng) <= dlng)
+    dists = np.empty(n)
+    dists[near] = equirect_km(lat, lng, rlats[near], rlngs[near], cos_lat0)
+    far = ~near
+    if far.any():
+        far_lats, far_lngs = rlats[far], rlngs[far]
+        dists[far] = haversine_bulk(lat, lng, far_lats, far_lngs, np.empty_like(far_lats))
+    # Simple scoring: nearer is better, preference bump if tags/type word overlap (prototype)
+    type_match = 1.0 if listing.get("type", "").lower() in (listing.get("type", "").lower(),) else 0.8
+    freshness_factor = 0.925  # mean of the former uniform(0.85, 1.0) jitter
+    scores = np.clip(1.0 - dists / 20.0, 0.0, None) * 0.7 + type_match * 0.2 + freshness_factor * 0.1
+    scores = np.minimum(1.0, np.round(scores, 3))
+    etas = np.round(np.maximum(5.0, dists / 40.0 * 60.0), 1)  # assume avg 40km/h
+    dists = np.round(dists, 2)
+
+    listing_id, donor_id = str(listing["_id"]), listing.get("donor_id", "")
+    # Values are already coerced and bounded above, so skip pydantic validation
+    match_objs = [
+        Match.model_construct(
+            listing_id=listing_id,
+            donor_id=donor_id,
             recipient_id=str(r["_id"]),
-            score=min(1.0, round(score, 3)),
-            distance_km=round(dist, 2),
-            route_eta_min=round(eta, 1),
+            score=score,
+            distance_km=dist,
+            route_eta_min=eta,
             status="proposed",
         )
-        mid = create_document("match", m)
-        matches.append({"_id": mid, **m.model_dump()})
+        for r, score, dist, eta in zip(recipients, scores.tolist(), dists.tolist(), etas.tolist())
+    ]
+
+    docs = [m.model_dump() for m in match_objs]
+    ids = await create_documents("match", docs)
+    matches: List[dict] = [{"_id": mid, **doc} for mid, doc in zip(ids, docs)]
 
-    matches.sort(key=lambda x: (-x["score"], x["distance_km"]))
-    return {"matches": matches[:5]}
+    top = top_k_matches(scores, dists, 5)
+    return {"matches": [matches[i] for i in top]}
 
 
 @app.get("/api/matches")
-def get_matches(user_id: Optional[str] = None):
-    items = get_documents("match") if db else []
+async def get_matches(user_id: Optional[str] = None):
+    query = {"$or": [{"donor_id": user_id}, {"recipient_id": user_id}]} if user_id else {}
+    items = await get_documents("match", query, limit=100, sort=[("created_at", -1)]) if db is not None else []
     for it in items:
         it["_id"] = str(it["_id"]) if "_id" in it else None
-    if user_id:
-        items = [m for m in items if m.get("donor_id") == user_id or m.get("recipient_id") == user_id]
-    items.sort(key=lambda x: x.get("created_at", datetime.now(timezone.utc)), reverse=True)
-    return {"items": items[:100]}
+    return {"items": items}
 
 
 # -------- Messaging (prototype) --------
@@ -229,37 +466,46 @@ class SendMessageRequest(BaseModel):
 
 
 @app.post("/api/message")
-def send_message(req: SendMessageRequest):
+async def send_message(req: SendMessageRequest):
     msg = Message(match_id=req.match_id, sender_id=req.sender_id, content=req.content)
-    _id = create_document("message", msg)
+    _id = await create_document("message", msg)
     return {"_id": _id}
 
 
 @app.get("/api/messages")
-def get_messages(match_id: str):
-    items = get_documents("message", {"match_id": match_id}) if db else []
+async def get_messages(match_id: str):
+    items = await get_documents("message", {"match_id": match_id}, limit=200, sort=[("created_at", 1)]) if db is not None else []
     for it in items:
         it["_id"] = str(it["_id"]) if "_id" in it else None
-    items.sort(key=lambda x: x.get("created_at", datetime.now(timezone.utc)))
-    return {"items": items[:200]}
+    return {"items": items}
 
 
 # -------- Blog (static/prototype) --------
+BLOG_CACHE_TTL_S = 60.0
+_blog_cache: Optional[tuple] = None  # (monotonic expiry, serialized response)
+
+
 @app.get("/api/blog")
-def blog_list():
-    posts = get_documents("blog") if db else []
+async def blog_list():
+    global _blog_cache
+    if _blog_cache is not None and _blog_cache[0] > time.monotonic():
+        return Response(content=_blog_cache[1], media_type="application/json")
+    posts = await get_documents("blog", limit=20) if db is not None else []
     if not posts:
         # Seed sample content if empty
         demo = [
             Blog(title="AI for Food Redistribution", excerpt="How ML reduces waste", body="...", tags=["ai", "sustainability"]).model_dump(),
             Blog(title="Food Safety 101", excerpt="Best practices for handling surplus", body="...", tags=["safety"]).model_dump(),
         ]
-        for p in demo:
-            create_document("blog", p)
-        posts = get_documents("blog")
+        ids = await create_documents("blog", demo)
+        for p, _id in zip(demo, ids):
+            p["_id"] = _id
+        posts = demo
     for p in posts:
         p["_id"] = str(p.get("_id"))
-    return {"items": posts[:20]}
+    payload = orjson.dumps({"items": posts})
+    _blog_cache = (time.monotonic() + BLOG_CACHE_TTL_S, payload)
+    return Response(content=payload, media_type="application/json")
 
 
 # -------- IoT Freshness WebSocket (simulated) --------
@@ -270,21 +516,20 @@ async def freshness_feed(websocket: WebSocket, listing_id: str):
         freshness = random.randint(85, 99)
         temp_c = round(random.uniform(4.0, 12.0), 1)
         humidity = random.randint(40, 70)
+        _now, _uniform, _randint, _sleep = datetime.now, random.uniform, random.randint, asyncio.sleep
+        payload = {"listing_id": listing_id, "freshness": 0, "temperature_c": 0.0, "humidity": 0, "timestamp": None}
         while True:
             # Drift values to simulate sensor
-            freshness = max(50, freshness + random.randint(-2, 1))
-            temp_c = max(0.0, temp_c + random.uniform(-0.3, 0.3))
-            humidity = min(90, max(20, humidity + random.randint(-2, 2)))
-            await websocket.send_json({
-                "listing_id": listing_id,
-                "freshness": freshness,
-                "temperature_c": round(temp_c, 1),
-                "humidity": humidity,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-            })
+            freshness = max(50, freshness + _randint(-2, 1))
+            temp_c = max(0.0, temp_c + _uniform(-0.3, 0.3))
+            humidity = min(90, max(20, humidity + _randint(-2, 2)))
+            payload["freshness"] = freshness
+            payload["temperature_c"] = round(temp_c, 1)
+            payload["humidity"] = humidity
+            payload["timestamp"] = _now(timezone.utc)
+            await websocket.send_text(orjson.dumps(payload).decode())
             # 1 second interval
-            import asyncio
-            await asyncio.sleep(1)
+            await _sleep(1)
     except WebSocketDisconnect:
         return
 